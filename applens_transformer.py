@@ -1,7 +1,13 @@
 import pandas as pd
+import numpy as np
+import codecs
+import csv
 import logging
 import os
-from typing import Optional, List, Dict
+from typing import Optional, List, Dict, Iterable, Iterator, Union
+
+from csv_reader import begin_source_read, read_csv_pyarrow
+from pipeline_log import setup_pipeline_logger
 
 # --- CONFIGURATION ---
 
@@ -17,6 +23,17 @@ COLUMN_MAPPING: Dict[str, str] = {
     'Priority': 'Priority'  # ADDED: Read 'Priority' from source
 }
 
+# Declared source dtypes so the parsers skip per-column inference. Type and Status hold a
+# handful of distinct values, so they are read as categoricals; dates stay strings.
+SOURCE_DTYPES: Dict[str, str] = {
+    'Issue Key': 'string',
+    'Issue Type': 'category',
+    'Updated': 'string',
+    'Status': 'category',
+    'Resolved': 'string',
+    'Priority': 'string'
+}
+
 CONSTANTS: Dict[str, str] = {
     # REMOVED: 'Priority': 'NONE' -> We now read it from source
     'Application': 'HMOF',
@@ -29,57 +46,66 @@ FINAL_COLUMN_ORDER: List[str] = [
     'Status', 'Application', 'Assignment Group', 'Closed Date'
 ]
 
-# --- LOGGING ---
+# Inputs larger than this are streamed in CHUNK_SIZE-row chunks so peak memory
+# tracks the chunk, not the file
+STREAMING_THRESHOLD_BYTES = 100 * 1024 * 1024
+CHUNK_SIZE = 100_000
 
-def setup_logger(name: str = 'ApplensTransformer') -> logging.Logger:
-    logger = logging.getLogger(name)
-    logger.setLevel(logging.INFO)
+# Inputs at least this large are memory-mapped; below it the mmap setup outweighs the copy saved
+MMAP_THRESHOLD_BYTES = 16 * 1024 * 1024
 
-    if not logger.handlers:
-        # Console Handler
-        console_handler = logging.StreamHandler()
-        formatter = logging.Formatter('%(asctime)s - %(levelname)s - %(message)s')
-        console_handler.setFormatter(formatter)
-        logger.addHandler(console_handler)
-
-        # File Handler (delay=True prevents empty files on import)
-        file_handler = logging.FileHandler('applens_conversion.log', delay=True)
-        file_handler.setFormatter(formatter)
-        logger.addHandler(file_handler)
+# --- LOGGING ---
 
-    return logger
+def setup_logger(name: str = 'ApplensTransformer') -> logging.Logger:
+    return setup_pipeline_logger(name, 'applens_conversion.log', console=True)
 
 logger = setup_logger()
 
 # --- PIPELINE FUNCTIONS ---
 
-def load_source_data(file_path: str) -> Optional[pd.DataFrame]:
-    logger.info(f"Phase 1: Reading input CSV file from {file_path}")
-    
-    if not os.path.exists(file_path):
-        logger.error(f"File not found: {file_path}")
-        raise FileNotFoundError(f"Input file does not exist: {file_path}")
+def detect_csv_encoding(file_path: str, block_size: int = 1024 * 1024) -> str:
+    """Return 'utf-8' if the whole file decodes as UTF-8, else 'latin1'.
 
-    try:
-        # Check headers first to determine actual column names (handling case sensitivity)
+    Chunked reads decode lazily, so a bad byte deep in the file would only surface
+    after earlier chunks were written; checking up front keeps the latin1 fallback.
+    """
+    decoder = codecs.getincrementaldecoder('utf-8')()
+    with open(file_path, 'rb') as f:
         try:
-            header_df = pd.read_csv(file_path, nrows=0, encoding='utf-8')
+            for block in iter(lambda: f.read(block_size), b''):
+                decoder.decode(block)
+            decoder.decode(b'', final=True)
         except UnicodeDecodeError:
-            header_df = pd.read_csv(file_path, nrows=0, encoding='latin1')
-            
-        actual_file_columns = list(header_df.columns)
-        actual_col_map = {col.lower().strip(): col for col in actual_file_columns}
+            return 'latin1'
+    return 'utf-8'
+
+def load_source_data(file_path: Union[str, pd.DataFrame], chunksize: Optional[int] = None,
+                     use_mmap: bool = False) -> Union[pd.DataFrame, Iterator[pd.DataFrame]]:
+    from_frame = begin_source_read(file_path, logger, 'input CSV')
+
+    try:
+        # Check headers first to determine actual column names (handling case sensitivity).
+        # A plain csv.reader on the first line avoids spinning up a second pandas parser;
+        # utf-8-sig strips the BOM Jira exports carry, matching what read_csv reports.
+        if from_frame:
+            actual_file_columns = list(file_path.columns)
+        else:
+            with open(file_path, 'r', encoding='utf-8-sig', errors='replace', newline='') as f:
+                actual_file_columns = next(csv.reader(f), [])
+
+        actual_col_map = {col.lower().strip(): idx for idx, col in enumerate(actual_file_columns)}
         
-        usecols_actual = []
         normalization_map = {}
+        position_map = {}
         missing_cols = []
         
         for required_col in COLUMN_MAPPING.keys():
             req_lower = required_col.lower().strip()
             if req_lower in actual_col_map:
-                actual_name = actual_col_map[req_lower]
-                usecols_actual.append(actual_name)
+                col_idx = actual_col_map[req_lower]
+                actual_name = actual_file_columns[col_idx]
                 normalization_map[actual_name] = required_col
+                position_map[col_idx] = required_col
             else:
                 # If a column is missing but we have a constant for it or default logic, maybe warn instead of fail?
                 # But here strict mapping is usually safer.
@@ -90,31 +116,63 @@ def load_source_data(file_path: str) -> Optional[pd.DataFrame]:
             logger.error(error_msg)
             raise ValueError(error_msg)
 
-        # Read only required columns
-        try:
-            df = pd.read_csv(file_path, usecols=usecols_actual, encoding='utf-8')
-        except UnicodeDecodeError:
-            logger.warning("UTF-8 decode failed, retrying with latin1.")
-            df = pd.read_csv(file_path, usecols=usecols_actual, encoding='latin1')
+        # The C parser renames for us: positional usecols plus standard names in file
+        # order, so no renamed copy of the frame is built afterwards
+        usecols_positions = sorted(position_map)
+        standard_names = [position_map[idx] for idx in usecols_positions]
+        dtypes = {name: SOURCE_DTYPES[name] for name in standard_names}
 
-        # Normalize headers to standard names
-        df = df.rename(columns=normalization_map)
+        if from_frame:
+            df = file_path[list(normalization_map)].rename(columns=normalization_map).astype(dtypes)
+            logger.info(f"Successfully loaded {len(df)} rows.")
+            return df
+
+        if chunksize:
+            encoding = detect_csv_encoding(file_path)
+            if encoding != 'utf-8':
+                logger.warning("UTF-8 decode failed, streaming with latin1.")
+            reader = pd.read_csv(file_path, header=0, usecols=usecols_positions, names=standard_names,
+                                 dtype=dtypes, encoding=encoding, chunksize=chunksize, memory_map=use_mmap)
+            logger.info(f"Streaming input in chunks of {chunksize} rows.")
+            return iter(reader)
+
+        # Read only required columns (PyArrow when available, pandas C parser otherwise)
+        try:
+            categories = [name for name, dtype in dtypes.items() if dtype == 'category']
+            df = read_csv_pyarrow(file_path, normalization_map, use_mmap=use_mmap, categories=categories)
+        except (ImportError, ValueError) as e:
+            # pyarrow not installed, or it rejected the bytes (e.g. non UTF-8 input).
+            # Dtypes are declared, so low_memory's piecewise inference buys nothing.
+            logger.info(f"PyArrow CSV reader unavailable ({e}), using default parser.")
+            try:
+                df = pd.read_csv(file_path, header=0, usecols=usecols_positions, names=standard_names,
+                                 dtype=dtypes, encoding='utf-8', low_memory=False, memory_map=use_mmap)
+            except UnicodeDecodeError:
+                logger.warning("UTF-8 decode failed, retrying with latin1.")
+                df = pd.read_csv(file_path, header=0, usecols=usecols_positions, names=standard_names,
+                                 dtype=dtypes, encoding='latin1', low_memory=False, memory_map=use_mmap)
 
         logger.info(f"Successfully loaded {len(df)} rows.")
         return df
         
     except Exception as e:
-        logger.critical(f"Failed to read CSV file: {str(e)}")
+        logger.critical(f"Failed to read CSV file: {str(e)}", extra={'progress': 0})
         raise e
 
-def apply_transformations(df: pd.DataFrame) -> pd.DataFrame:
-    logger.info("Phase 2: Applying transformations...")
+def apply_transformations(df: pd.DataFrame, log_phase: bool = True) -> pd.DataFrame:
+    # Streamed chunks pass log_phase=False; transform_chunks reports their progress
+    if log_phase:
+        logger.info("Phase 2: Applying transformations...", extra={'progress': 50})
     
-    df_transformed = df.rename(columns=COLUMN_MAPPING)
+    # Rename in place; the pipeline rebinds df, so a renamed copy is never needed
+    df.rename(columns=COLUMN_MAPPING, inplace=True)
+    df_transformed = df
     
-    # Apply constants (Application, Assignment Group)
+    # Apply constants (Application, Assignment Group) as single-category Categoricals:
+    # one int8 code per row instead of a full column of references to the same string
+    constant_codes = np.zeros(len(df_transformed), dtype=np.int8)
     for col, val in CONSTANTS.items():
-        df_transformed[col] = val
+        df_transformed[col] = pd.Categorical.from_codes(constant_codes, categories=[val])
         
     # Optional: Fill empty Priority values with 'NONE' if some rows are missing it
     if 'Priority' in df_transformed.columns:
@@ -123,46 +181,127 @@ def apply_transformations(df: pd.DataFrame) -> pd.DataFrame:
         # Fallback if Priority somehow wasn't read
         df_transformed['Priority'] = 'NONE'
 
+    # Settle the strict Applens column order once; the writers take frames as-is
+    df_transformed = df_transformed.reindex(columns=FINAL_COLUMN_ORDER)
+
     return df_transformed
 
-def validate_and_clean(df: pd.DataFrame) -> pd.DataFrame:
-    logger.info("Phase 3: Validating data...")
+def validate_and_clean(df: pd.DataFrame, log_phase: bool = True) -> pd.DataFrame:
+    if log_phase:
+        logger.info("Phase 3: Validating data...", extra={'progress': 75})
     
-    # Drop rows missing Ticket ID
-    initial_count = len(df)
-    df = df.dropna(subset=['Ticket ID'])
-    if len(df) < initial_count:
-        logger.warning(f"Dropped {initial_count - len(df)} rows due to missing Ticket IDs.")
+    # Drop rows missing Ticket ID with one boolean mask; clean inputs skip the copy entirely
+    has_ticket_id = df['Ticket ID'].notna()
+    dropped = len(df) - int(has_ticket_id.sum())
+    if dropped:
+        df = df.loc[has_ticket_id]
+        logger.warning(f"Dropped {dropped} rows due to missing Ticket IDs.")
 
-    # Handle nulls in Closed Date for visual cleanliness (still as strings)
-    if 'Closed Date' in df.columns:
-        df['Closed Date'] = df['Closed Date'].fillna('')
+    # Nulls in Closed Date are left as NA: the Excel writer already renders them as
+    # blank cells, and columnar outputs keep a real null instead of ''
 
-    logger.info("Validation complete.")
+    if log_phase:
+        logger.info("Validation complete.")
     return df
 
-def save_target_file(df: pd.DataFrame, output_path: str) -> bool:
-    logger.info(f"Phase 4: Writing output to {output_path}")
+class InputStreamError(Exception):
+    """A streamed input failed while being read or transformed, not while being written."""
+
+def transform_chunks(chunks: Iterator[pd.DataFrame]) -> Iterator[pd.DataFrame]:
+    """Runs Phases 2-3 on each streamed chunk as the writer pulls it.
+
+    The chunks are read lazily inside the write phase, so they log one line each instead
+    of repeating the phase messages (whose progress would jump back from 90).
+    """
+    chunk_no = 0
+    try:
+        for chunk_no, chunk in enumerate(chunks, start=1):
+            chunk = validate_and_clean(apply_transformations(chunk, log_phase=False), log_phase=False)
+            logger.info(f"Processed input chunk {chunk_no} ({len(chunk)} rows).")
+            yield chunk
+    except Exception as e:
+        raise InputStreamError(f"Failed to read input chunk {chunk_no + 1}: {e}") from e
+
+def save_target_file(df: Union[pd.DataFrame, Iterable[pd.DataFrame]], output_path: str) -> bool:
+    logger.info(f"Phase 4: Writing output to {output_path}", extra={'progress': 90})
     
+    # Set once the output file is opened, so a failure before that leaves any existing
+    # file alone and a failure after it removes the partial output
+    output_started = False
     try:
-        df_final = df[FINAL_COLUMN_ORDER]
-        # Since we keep dates as strings, there should be no timezone-aware datetimes.
-        df_final.to_excel(output_path, index=False)
-        logger.info("SUCCESS: Transformation complete.")
+        # A streamed pipeline hands over an iterable of chunks instead of one frame.
+        # Frames already arrive in FINAL_COLUMN_ORDER from apply_transformations.
+        chunks = [df] if isinstance(df, pd.DataFrame) else df
+        output_ext = os.path.splitext(output_path)[1].lower()
+
+        if output_ext in ('.parquet', '.feather'):
+            # Columnar outputs for non-human consumers: same data, far cheaper to write and load.
+            # Feather stores no index, so the concat also hands it a default one after row drops.
+            df_final = pd.concat(chunks, ignore_index=True)
+            output_started = True
+            if output_ext == '.parquet':
+                df_final.to_parquet(output_path, engine='pyarrow', compression='snappy', index=False)
+            else:
+                df_final.to_feather(output_path)
+        else:
+            # Since we keep dates as strings, there should be no timezone-aware datetimes.
+            # constant_memory flushes each row to disk once the next begins, bounding RAM
+            # regardless of row count. Rows are written directly because to_excel emits
+            # cells column by column, which constant_memory mode cannot accept.
+            # strings_to_urls is off so URL-looking text stays plain text, as before.
+            output_started = True
+            with pd.ExcelWriter(output_path, engine='xlsxwriter',
+                                engine_kwargs={'options': {'constant_memory': True, 'strings_to_urls': False}}) as writer:
+                worksheet = writer.book.add_worksheet('Sheet1')
+                # Same header look as pandas' default to_excel output
+                header_format = writer.book.add_format({'bold': True, 'border': 1, 'align': 'center', 'valign': 'top'})
+                worksheet.write_row(0, 0, FINAL_COLUMN_ORDER, header_format)
+
+                row_idx = 0
+                for chunk in chunks:
+                    # Missing values (NaN/NA) become blank cells, as with na_rep=''
+                    rows = chunk.astype(object).where(chunk.notna(), None)
+                    # write_row past the sheet's last row returns -1 instead of raising, so
+                    # check each chunk first; the except below then drops the partial file
+                    if row_idx + len(rows) >= worksheet.xls_rowmax:
+                        raise ValueError(f"This sheet is too large! Excel allows at most {worksheet.xls_rowmax - 1} data rows.")
+                    for row_idx, row in enumerate(rows.itertuples(index=False, name=None), start=row_idx + 1):
+                        worksheet.write_row(row_idx, 0, row)
+        logger.info("SUCCESS: Transformation complete.", extra={'progress': 100})
         return True
     except Exception as e:
-        logger.error(f"Failed to write output file: {e}")
+        # A half-written workbook must not pass for a finished export
+        if output_started and os.path.exists(output_path):
+            os.remove(output_path)
+        if isinstance(e, InputStreamError):
+            logger.error(str(e), extra={'progress': 0})
+        else:
+            logger.error(f"Failed to write output file: {e}", extra={'progress': 0})
         return False
 
-def run_applens_transformation_pipeline(input_path: str, output_path: str) -> bool:
+def run_applens_transformation_pipeline(input_path: Union[str, pd.DataFrame], output_path: str,
+                                        file_size: Optional[int] = None) -> bool:
     try:
-        df = load_source_data(input_path)
-        df = apply_transformations(df)
-        df = validate_and_clean(df)
+        # Callers that already stat'ed the input (the GUI worker) pass its size in;
+        # fetched frames are already in memory, so they are never streamed
+        if isinstance(input_path, pd.DataFrame):
+            file_size = 0
+        elif file_size is None:
+            file_size = os.path.getsize(input_path) if os.path.exists(input_path) else 0
+        use_mmap = file_size >= MMAP_THRESHOLD_BYTES
+
+        if file_size > STREAMING_THRESHOLD_BYTES:
+            # No cross-row dependencies, so each chunk runs the full pipeline on its own
+            chunks = load_source_data(input_path, chunksize=CHUNK_SIZE, use_mmap=use_mmap)
+            df = transform_chunks(chunks)
+        else:
+            df = load_source_data(input_path, use_mmap=use_mmap)
+            df = apply_transformations(df)
+            df = validate_and_clean(df)
         success = save_target_file(df, output_path)
         return success
     except Exception as e:
-        logger.error(f"Pipeline failed: {str(e)}")
+        logger.error(f"Pipeline failed: {str(e)}", extra={'progress': 0})
         return False
 
 if __name__ == "__main__":
@@ -0,0 +1,35 @@
+import logging
+import logging.handlers
+import queue
+
+class GUIHandler(logging.handlers.QueueHandler):
+    """Queues ``(line, progress)`` pairs for the GUI thread to drain in batches.
+
+    ``progress`` comes from the record's ``extra={'progress': n}`` (None when absent),
+    so the GUI drives its progress bar without parsing log text.
+
+    When the queue is full (the GUI is stalled, e.g. behind a modal dialog), records
+    below ``blocking_level`` are dropped and counted, while errors and progress records
+    make the worker wait. Every record still reaches the file handlers.
+    """
+    def __init__(self, log_queue, blocking_level=logging.ERROR):
+        logging.handlers.QueueHandler.__init__(self, log_queue)
+        self.blocking_level = blocking_level
+        # Only ever incremented (under the handler lock); the GUI tracks what it reported
+        self.dropped = 0
+
+    def prepare(self, record):
+        return self.format(record) + '\n', getattr(record, 'progress', None)
+
+    def emit(self, record):
+        try:
+            log_entry = self.prepare(record)
+            try:
+                self.queue.put_nowait(log_entry)
+            except queue.Full:
+                if record.levelno >= self.blocking_level or log_entry[1] is not None:
+                    self.queue.put(log_entry)
+                else:
+                    self.dropped += 1
+        except Exception:
+            self.handleError(record)
@@ -1,17 +1,138 @@
 import os
+import itertools
+import json
 import logging
 import requests
 import pandas as pd
+from requests.adapters import HTTPAdapter
 from requests.auth import HTTPBasicAuth
+from concurrent.futures import ThreadPoolExecutor
 from dotenv import load_dotenv
 
+# Optional C extensions for ISO-8601 and JSON parsing; pandas/requests handle them when absent
+try:
+    import ciso8601
+except ImportError:
+    ciso8601 = None
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
 # Load environment variables from .env if present
 load_dotenv()
 
 # Setup logging
 logger = logging.getLogger("ApplensTransformer")
 
-def fetch_jira_issues(base_url, email, api_token, start_date, end_date, output_csv_path):
+# Columns of the flattened CSV dump, in output order
+FLAT_COLUMNS = [
+    'Issue Key', 'Issue Type', 'Updated', 'Status', 'Resolved', 'Project Name',
+    'Summary', 'Assignee', 'Priority', 'Created', 'Platform', 'Worklog'
+]
+
+# Trailing UTC offset of a Jira timestamp ('Z', '-0800' or '+05:30')
+UTC_OFFSET_PATTERN = r'(?:Z|[+-]\d{2}:?\d{2})$'
+
+# Shared stand-in for null nested fields while flattening; never mutated
+EMPTY_FIELD = {}
+
+# Jira fields each conversion consumes ("key" is always returned). Applens only maps
+# type/dates/status/priority; MSM needs the wider set. The embedded "worklog" field is
+# never read (Worklog comes from timespent), so neither profile asks for it.
+FIELD_PROFILES = {
+    'applens': ["issuetype", "updated", "status", "resolutiondate", "priority"],
+    'msm': [
+        "issuetype", "updated", "status", "resolutiondate",
+        "project", "summary", "assignee", "priority", "created",
+        "timespent", "customfield_12345"
+    ]
+}
+
+def flatten_issues(issues):
+    # Column lists rather than one dict per row: pd.DataFrame then copies each list once
+    # instead of transposing row records. The schema is fixed, so the loop is specialized
+    # by hand: nested lookups (e.g. priority.name) are inlined, null system fields share
+    # one empty dict, and the list appends are bound once per page.
+    keys, types, updated, statuses, resolved, projects = [], [], [], [], [], []
+    summaries, assignees, priorities, created, platforms, worklogs = [], [], [], [], [], []
+    add_key, add_type, add_updated, add_status = keys.append, types.append, updated.append, statuses.append
+    add_resolved, add_project, add_summary = resolved.append, projects.append, summaries.append
+    add_assignee, add_priority, add_created = assignees.append, priorities.append, created.append
+    add_platform, add_worklog = platforms.append, worklogs.append
+
+    for issue in issues:
+        fields = issue.get('fields') or EMPTY_FIELD
+        add_key(issue.get('key'))
+        add_type((fields.get('issuetype') or EMPTY_FIELD).get('name', ''))
+        add_updated(fields.get('updated'))
+        add_status((fields.get('status') or EMPTY_FIELD).get('name', ''))
+        add_resolved(fields.get('resolutiondate'))
+        add_project((fields.get('project') or EMPTY_FIELD).get('name', ''))
+        add_summary(fields.get('summary'))
+        add_assignee((fields.get('assignee') or EMPTY_FIELD).get('displayName', ''))
+        add_priority((fields.get('priority') or EMPTY_FIELD).get('name', ''))
+        add_created(fields.get('created'))
+        # Custom fields may hold an option dict or a bare value
+        platform = fields.get('customfield_12345')
+        add_platform(platform.get('name', '') if isinstance(platform, dict) else (platform or ''))
+        # Using timespent field directly
+        add_worklog(fields.get('timespent') or 0)
+
+    return {
+        'Issue Key': keys, 'Issue Type': types, 'Updated': updated, 'Status': statuses,
+        'Resolved': resolved, 'Project Name': projects, 'Summary': summaries,
+        'Assignee': assignees, 'Priority': priorities, 'Created': created,
+        'Platform': platforms, 'Worklog': worklogs
+    }
+
+def dump_json(obj):
+    # Request bodies go out as bytes, so requests never runs its stdlib encoder
+    return orjson.dumps(obj) if orjson else json.dumps(obj, separators=(',', ':')).encode('utf-8')
+
+def parse_iso_timestamp(value):
+    # Keeps the ticket's wall-clock time and drops the offset, like the pandas path and
+    # a CSV export; anything ciso8601 rejects becomes NaT, matching errors='coerce'
+    try:
+        parsed = ciso8601.parse_datetime(value)
+    except (ValueError, TypeError):
+        return None
+    return parsed.replace(tzinfo=None)
+
+def strip_utc_offset(values):
+    # '2024-03-09T10:15:00.000-0800' -> '2024-03-09T10:15:00.000': the wall-clock time,
+    # as the CSV export shows it, and no mixed offsets left for pd.to_datetime to reject
+    return values.str.replace(UTC_OFFSET_PATTERN, '', regex=True)
+
+def parse_dates_cached(values):
+    # Bulk-updated tickets share timestamps, so parse each distinct value once and
+    # broadcast the result back; near-unique columns go straight to pd.to_datetime.
+    # Jira REST v3 returns ISO-8601, so skip format inference and stay on the C path.
+    # Offsets are stripped first, so mixed offsets (e.g. across a DST change) stay on
+    # that path too; the result is tz-naive local time, ready for Excel.
+    codes, uniques = pd.factorize(values)
+    if ciso8601 is not None and len(uniques):
+        parsed = pd.DatetimeIndex([parse_iso_timestamp(u) for u in uniques])
+    elif len(uniques) and len(uniques) <= 0.8 * len(values):
+        parsed = pd.to_datetime(strip_utc_offset(pd.Index(uniques)), errors='coerce', format='ISO8601')
+    else:
+        return pd.to_datetime(strip_utc_offset(values), errors='coerce', format='ISO8601')
+    return pd.Series(parsed.take(codes, allow_fill=True, fill_value=pd.NaT), index=values.index, name=values.name)
+
+def fetch_jira_issues(base_url, email, api_token, start_date, end_date, output_csv_path, profile='msm'):
+    df = fetch_jira_frame(base_url, email, api_token, start_date, end_date, profile)
+    if df is None:
+        return False
+
+    df.to_csv(output_csv_path, index=False)
+    logger.info(f"Saved Jira dump to {output_csv_path}")
+    return True
+
+def fetch_jira_frame(base_url, email, api_token, start_date, end_date, profile='msm'):
+    # Returns the flattened dump as text columns, exactly as the CSV dump would read
+    # back (dates in to_csv's format, blanks as NA), so the transformers can take it
+    # directly; None when no tickets match
 
     # 1. Validation & Setup
     if not base_url: base_url = os.getenv("JIRA_URL")
@@ -46,17 +167,33 @@ def fetch_jira_issues(base_url, email, api_token, start_date, end_date, output_c
     auth = HTTPBasicAuth(email, api_token)
     headers = {"Accept": "application/json", "Content-Type": "application/json"}
 
-    # Define fields to fetch - essential for your transformers
-    fields_to_fetch = [
-        "key", "issuetype", "updated", "status", "resolutiondate", 
-        "project", "summary", "assignee", "priority", "created", 
-        "worklog", "timespent", "customfield_12345" # Added timespent explicitly
-    ]
+    # One session for every page: the TCP+TLS connection is kept alive and reused.
+    # requests already sends Accept-Encoding: gzip, deflate and decodes transparently.
+    session = requests.Session()
+    session.auth = auth
+    session.headers.update(headers)
+    session.mount("https://", HTTPAdapter(pool_connections=1, pool_maxsize=1))
+
+    # Pagination is sequential token-chasing, but each page can be flattened while the
+    # next one downloads; the main thread waits on HTTP, so two workers are plenty
+    executor = ThreadPoolExecutor(max_workers=2, thread_name_prefix='jira-flatten')
+    flatten_futures = []
 
-    all_issues = []
+    # Define fields to fetch - only what the target transformer consumes
+    fields_to_fetch = FIELD_PROFILES[profile]
+
+    total_issues = 0
     max_results = 100 # Batch size
     next_page_token = None
 
+    # The JQL and field list never change between pages: serialize them once and splice
+    # only the page token into the cached bytes (the body ends with the closing brace)
+    base_payload = dump_json({
+        "jql": jql,
+        "maxResults": max_results,
+        "fields": fields_to_fetch
+    })
+
     try:
         while True:
             # Log pagination progress
@@ -65,85 +202,64 @@ def fetch_jira_issues(base_url, email, api_token, start_date, end_date, output_c
             else:
                 logger.info(f"Fetching first page...")
             
-            payload = {
-                "jql": jql,
-                "maxResults": max_results,
-                "fields": fields_to_fetch
-            }
-            
             # Use nextPageToken for pagination if available
             if next_page_token:
-                payload["nextPageToken"] = next_page_token
+                payload = base_payload[:-1] + b',"nextPageToken":' + dump_json(next_page_token) + b'}'
+            else:
+                payload = base_payload
 
-            response = requests.post(search_url, headers=headers, json=payload, auth=auth)
+            # Content-Type: application/json is already set on the session
+            response = session.post(search_url, data=payload)
 
             if response.status_code != 200:
                 error_msg = f"Jira API Error {response.status_code}: {response.text}"
                 logger.error(error_msg)
                 raise Exception(error_msg)
 
-            data = response.json()
+            data = orjson.loads(response.content) if orjson else response.json()
             issues = data.get('issues', [])
             next_page_token = data.get('nextPageToken') # Get token for next page
             
             if not issues:
                 break
             
-            all_issues.extend(issues)
+            flatten_futures.append(executor.submit(flatten_issues, issues))
+            total_issues += len(issues)
             
             # If no next_page_token, we are done
             if not next_page_token:
                 break
 
-        logger.info(f"Total issues fetched: {len(all_issues)}")
+        logger.info(f"Total issues fetched: {total_issues}")
         
-        if not all_issues:
+        if not total_issues:
             logger.warning("No tickets found matching criteria.")
-            return False
+            return None
 
-        # 4. Flatten JSON to CSV format
-        parsed_data = []
-        for issue in all_issues:
-            fields = issue.get('fields', {})
-            
-            # Helper for nested dicts (e.g. priority.name)
-            def get_val(key, subkey='name'):
-                val = fields.get(key)
-                if isinstance(val, dict): return val.get(subkey, '')
-                return val if val else ''
-
-            row = {
-                'Issue Key': issue.get('key'),
-                'Issue Type': get_val('issuetype'),
-                'Updated': fields.get('updated'),
-                'Status': get_val('status'),
-                'Resolved': fields.get('resolutiondate'),
-                'Project Name': get_val('project'),
-                'Summary': fields.get('summary'),
-                'Assignee': get_val('assignee', 'displayName'),
-                'Priority': get_val('priority'),
-                'Created': fields.get('created'),
-                'Platform': get_val('customfield_12345'),
-                # Using timespent field directly
-                'Worklog': fields.get('timespent', 0) if fields.get('timespent') else 0
-            }
-            parsed_data.append(row)
-
-        # 5. Save to CSV
+        # 4. Flatten JSON to CSV format (pages were flattened while the next one downloaded)
+        pages = [f.result() for f in flatten_futures]
+        parsed_data = {
+            col: list(itertools.chain.from_iterable(page[col] for page in pages))
+            for col in FLAT_COLUMNS
+        }
+
+        # 5. Build the dump frame
         df = pd.DataFrame(parsed_data)
         
-        # Datetime timezone fix for Excel compatibility
+        # Datetime timezone fix for Excel compatibility (offsets dropped, wall-clock time kept)
         date_cols = ["Updated", "Resolved", "Created"]
         for col in date_cols:
             if col in df.columns:
-                df[col] = pd.to_datetime(df[col], errors='coerce')
-                if pd.api.types.is_datetime64_any_dtype(df[col]):
-                    df[col] = df[col].dt.tz_localize(None)
+                df[col] = parse_dates_cached(df[col])
 
-        df.to_csv(output_csv_path, index=False)
-        logger.info(f"Saved Jira dump to {output_csv_path}")
-        return True
+        # Render every value as the CSV round trip would: string dtype formats whole
+        # datetime columns the way to_csv does, and blank cells read back as missing
+        df = df.astype('string').replace('', pd.NA)
+        return df
 
     except Exception as e:
-        logger.error(f"Failed to fetch from Jira: {str(e)}")
-        raise e
\ No newline at end of file
+        logger.error(f"Failed to fetch from Jira: {str(e)}", extra={'progress': 0})
+        raise e
+    finally:
+        executor.shutdown(wait=False, cancel_futures=True)
+        session.close()
\ No newline at end of file
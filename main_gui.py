@@ -1,39 +1,58 @@
 import FreeSimpleGUI as sg
 import logging
 import os
+import queue
 import shutil
-import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
+from functools import lru_cache
 from dotenv import load_dotenv
 
-# Load env variables at start
-load_dotenv()
+# The pipelines (pandas, pyarrow, requests) are imported on the worker thread, so the
+# window appears without waiting for them; see warm_imports and the run wrappers
+from gui_log import GUIHandler
+from pipeline_log import CachedTimeFormatter, LOG_FORMAT
 
-# Import BOTH pipelines using aliases for clarity
-from applens_transformer import run_applens_transformation_pipeline as run_applens
-from msm_transformer import run_msm_transformation_pipeline as run_msm
-from jira_fetcher import fetch_jira_issues
+# Output formats offered in the GUI, mapped to the extension the pipelines dispatch on
+OUTPUT_FORMATS = {'Excel': '.xlsx', 'Parquet': '.parquet', 'Feather': '.feather'}
+OUTPUT_FILE_TYPES = (("Excel Files", "*.xlsx"), ("Parquet Files", "*.parquet"), ("Feather Files", "*.feather"))
 
-class GUIHandler(logging.Handler):
-    """Sends logs to the GUI."""
-    def __init__(self, window_object, key):
-        logging.Handler.__init__(self)
-        self.window = window_object
-        self.key = key
+# Rule between the API credentials and the date pickers
+SEPARATOR = '_' * 60
 
-    def emit(self, record):
-        log_entry = self.format(record)
-        self.window.write_event_value('-LOG-UPDATE-', log_entry + '\n')
+# Every key the event loop updates through window[...]; checked once after the window is built
+WIDGET_KEYS = (
+    '-PANEL-FILE-', '-PANEL-API-', '-INPUT-FILE-', '-API-URL-', '-API-EMAIL-', '-API-TOKEN-',
+    '-DATE-FROM-', '-DATE-TO-', '-OUTPUT-', '-FORMAT-', '-PROG-', '-RUN-', '-LOG-'
+)
 
-def main():
-    sg.theme('SystemDefault')
+# Bound on queued GUI log lines; the GUI drains them every read timeout
+LOG_QUEUE_SIZE = 2000
 
-    # Fetch default values from .env (or use empty string/defaults if missing)
-    default_url = os.getenv('JIRA_URL', 'https://your-domain.atlassian.net')
-    default_email = os.getenv('JIRA_EMAIL', '')
-    default_token = os.getenv('JIRA_API_TOKEN', '')
+# While a run is active the loop wakes every LOG_TICK_MS to drain the log queue; idle,
+# it blocks until the next event instead of spinning
+LOG_TICK_MS = 50
+TICK_KEY = '-TICK-'
+
+# Drained lines reach the log box once this many are pending or this many seconds passed
+LOG_FLUSH_LINES = 16
+LOG_FLUSH_INTERVAL = 0.1
+
+@lru_cache(maxsize=1)
+def env_defaults():
+    """Parses .env once and returns the Jira URL, email and token defaults."""
+    load_dotenv()
+    return (
+        os.getenv('JIRA_URL', 'https://your-domain.atlassian.net'),
+        os.getenv('JIRA_EMAIL', ''),
+        os.getenv('JIRA_API_TOKEN', '')
+    )
 
-    layout = [
+def build_layout(default_url, default_email, default_token):
+    """Builds a fresh element tree; a Window needs new element instances every time."""
+    return [
         [sg.Text('Jira Automation Tool', font=('Helvetica', 16), pad=((0,0),(10,20)))],
         
         # SECTION 1: Conversion Type Selection
@@ -59,7 +78,7 @@ def main():
                 [sg.Text('Jira URL:', size=(10, 1)), sg.Input(default_text=default_url, key='-API-URL-', expand_x=True)],
                 [sg.Text('Email:', size=(10, 1)), sg.Input(default_text=default_email, key='-API-EMAIL-', expand_x=True)],
                 [sg.Text('API Token:', size=(10, 1)), sg.Input(default_text=default_token, key='-API-TOKEN-', password_char='*', expand_x=True)],
-                [sg.Text('_' * 60)],
+                [sg.Text(SEPARATOR)],
                 # Added enable_events=True to date inputs so we catch manual typing
                 [sg.Text('From Date:', size=(10, 1)), 
                  sg.Input(key='-DATE-FROM-', size=(20,1), enable_events=True), 
@@ -75,7 +94,9 @@ def main():
         [sg.Frame('3. Output', layout=[
             [sg.Text('Save Output As:', size=(15, 1)), 
              sg.Input(key='-OUTPUT-', default_text='Applens_Upload_Output.xlsx', expand_x=True), 
-             sg.FileSaveAs(file_types=(("Excel Files", "*.xlsx"),))]
+             sg.Combo(list(OUTPUT_FORMATS), default_value='Excel', key='-FORMAT-', readonly=True, enable_events=True, size=(8, 1)),
+             # Explicit target: the default (ThisRow, -1) would now be the format combo
+             sg.FileSaveAs(target='-OUTPUT-', file_types=OUTPUT_FILE_TYPES)]
         ], pad=((0,0),(0,20)), expand_x=True)],
 
         # Progress & Controls
@@ -91,21 +112,51 @@ def main():
                       font=('Consolas', 9), background_color='#f0f0f0', text_color='black', expand_x=True, expand_y=True)]
     ]
 
-    window = sg.Window('Jira Automation Tool', layout, resizable=True, finalize=True)
+def main():
+    sg.theme('SystemDefault')
+    # Widget keys are validated once below, so a mistyped window[key] should be reported
+    # rather than be silently matched to the closest existing key
+    sg.set_options(suppress_key_guessing=True)
+
+    # Fetch default values from .env (or use empty string/defaults if missing)
+    default_url, default_email, default_token = env_defaults()
+
+    window = sg.Window('Jira Automation Tool', build_layout(default_url, default_email, default_token), resizable=True, finalize=True)
+
+    missing_keys = [key for key in WIDGET_KEYS if key not in window.AllKeysDict]
+    if missing_keys:
+        window.close()
+        raise KeyError(f"Layout is missing widget keys: {missing_keys}")
 
     logger = logging.getLogger('ApplensTransformer') 
-    gui_handler = GUIHandler(window, '-LOG-')
-    gui_handler.setFormatter(logging.Formatter('%(asctime)s - %(levelname)s - %(message)s'))
+    log_queue = queue.Queue(maxsize=LOG_QUEUE_SIZE)
+    gui_handler = GUIHandler(log_queue)
+    gui_handler.setFormatter(CachedTimeFormatter(LOG_FORMAT))
     logger.addHandler(gui_handler)
 
+    # One long-lived worker runs every pipeline; the Run button is disabled meanwhile
+    executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='pipeline')
+    # Queued first, so a quick Run click simply waits for the imports to finish
+    executor.submit(warm_imports)
+
+    def on_run_done(future):
+        """Posts -THREAD-DONE- with the run's result, like perform_long_operation's end key."""
+        error = future.exception()
+        if error is not None:
+            logger.error(f"Run failed: {error}", extra={'progress': 0})
+        # The user may have closed the window mid-run; there is nobody left to notify
+        if window.was_closed():
+            return
+        window.write_event_value('-THREAD-DONE-', error is None and bool(future.result()))
+
     def update_output_filename(values):
         """Helper to dynamically construct the output filename based on dates and type."""
         start_date = values['-DATE-FROM-']
         end_date = values['-DATE-TO-']
         is_msm = values['-TYPE-MSM-']
         
-        # Determine base suffix based on conversion type
-        suffix = "MSM_Upload_Output.xlsx" if is_msm else "Applens_Upload_Output.xlsx"
+        # Determine base suffix based on conversion type and output format
+        suffix = ("MSM_Upload_Output" if is_msm else "Applens_Upload_Output") + OUTPUT_FORMATS[values['-FORMAT-']]
         
         # If dates are present, prepend them
         if start_date and end_date:
@@ -117,41 +168,99 @@ def main():
         else:
             # Fallback if no dates
             new_name = suffix
-            
-        window['-OUTPUT-'].update(new_name)
+
+        # Keystrokes and repeated radio clicks often rebuild the name already shown;
+        # compare with the field's current value (it may have been edited) to skip the Tk write
+        if new_name != values['-OUTPUT-']:
+            window['-OUTPUT-'].update(new_name)
+
+    last_progress = 0
+
+    def set_progress(value):
+        """Updates the progress bar only when the value actually changes."""
+        nonlocal last_progress
+        if value != last_progress:
+            window['-PROG-'].update(value)
+            last_progress = value
+
+    pending_lines = deque()
+    last_flush = time.monotonic()
+    reported_drops = 0
+
+    def flush_log_queue(force=False):
+        """Drains queued log lines and appends them to the log box in coalesced batches."""
+        nonlocal last_flush, reported_drops
+        while True:
+            try:
+                pending_lines.append(log_queue.get_nowait())
+            except queue.Empty:
+                break
+        dropped = gui_handler.dropped - reported_drops
+        if dropped:
+            pending_lines.append((f"... {dropped} log lines skipped while the window was busy (see the log file) ...\n", None))
+            reported_drops += dropped
+        if not pending_lines:
+            return
+
+        # Busy event streams (typing, clicks) would otherwise flush a line or two per event
+        now = time.monotonic()
+        if not force and len(pending_lines) < LOG_FLUSH_LINES and now - last_flush < LOG_FLUSH_INTERVAL:
+            return
+
+        batch = ''.join(line for line, _ in pending_lines)
+        # Pipelines tag phase/outcome records with extra={'progress': n}; the latest one wins
+        progress = next((p for _, p in reversed(pending_lines) if p is not None), None)
+        pending_lines.clear()
+        last_flush = now
+        window['-LOG-'].update(batch, append=True)
+
+        if progress is not None:
+            set_progress(progress)
+
+    run_active = False
 
     while True:
-        event, values = window.read()
+        # Wake up periodically during runs so queued log lines reach the GUI in batches
+        event, values = window.read(timeout=LOG_TICK_MS if run_active else None, timeout_key=TICK_KEY)
 
         if event == sg.WIN_CLOSED:
             break
-        
+
+        # Ticks and run completion (before its modal popup) always flush
+        is_tick = event == TICK_KEY
+        flush_log_queue(force=is_tick or event == '-THREAD-DONE-')
+
+        # Ticks only exist to drain the log queue; skip the event dispatch below
+        if is_tick:
+            continue
+
+        # Each event has exactly one branch, so the chain stops at the first match
         # Toggle Visibility based on Source Selection
         if event == '-SRC-FILE-':
             window['-PANEL-FILE-'].update(visible=True)
             window['-PANEL-API-'].update(visible=False)
         
-        if event == '-SRC-API-':
+        elif event == '-SRC-API-':
             window['-PANEL-FILE-'].update(visible=False)
             window['-PANEL-API-'].update(visible=True)
 
-        # EVENT: Auto-Update Output Filename based on Radio Selection OR Dates
-        if event in ('-TYPE-MSM-', '-TYPE-APPLENS-', '-DATE-FROM-', '-DATE-TO-'):
-            # Only update filename automatically if we are in API mode (since dates matter there)
-            # OR if the user is just switching types.
-            if values['-SRC-API-'] or event in ('-TYPE-MSM-', '-TYPE-APPLENS-'):
+        # EVENT: Auto-Update Output Filename when the user switches types
+        # (both conversions write every format in OUTPUT_FORMATS)
+        elif event in ('-TYPE-MSM-', '-TYPE-APPLENS-'):
+            update_output_filename(values)
+
+        # EVENT: Auto-Update Output Filename based on Dates
+        # Only in API mode, since dates only matter there
+        elif event in ('-DATE-FROM-', '-DATE-TO-'):
+            if values['-SRC-API-']:
                 update_output_filename(values)
 
-        if event == '-LOG-UPDATE-':
-            log_msg = values[event]
-            window['-LOG-'].update(log_msg, append=True)
-            if "Phase 1" in log_msg: window['-PROG-'].update(25)
-            elif "Phase 2" in log_msg: window['-PROG-'].update(50)
-            elif "Phase 3" in log_msg: window['-PROG-'].update(75)
-            elif "SUCCESS" in log_msg: window['-PROG-'].update(100)
-            elif "failed" in log_msg.lower(): window['-PROG-'].update(0)
+        # EVENT: Swap the extension of the current output path to match the chosen format
+        elif event == '-FORMAT-':
+            base_name = os.path.splitext(values['-OUTPUT-'])[0] or ('MSM_Upload_Output' if values['-TYPE-MSM-'] else 'Applens_Upload_Output')
+            window['-OUTPUT-'].update(base_name + OUTPUT_FORMATS[values['-FORMAT-']])
 
-        if event == '-RUN-':
+        elif event == '-RUN-':
             output_path = values['-OUTPUT-']
             is_msm = values['-TYPE-MSM-']
             
@@ -162,8 +271,9 @@ def main():
                     continue
                 
                 window['-RUN-'].update(disabled=True, text='Processing...')
-                window['-PROG-'].update(0)
-                threading.Thread(target=run_wrapper_file, args=(input_file, output_path, is_msm, window), daemon=True).start()
+                set_progress(0)
+                run_active = True
+                executor.submit(run_wrapper_file, input_file, output_path, is_msm).add_done_callback(on_run_done)
                 
             else:
                 api_url = values['-API-URL-']
@@ -177,14 +287,19 @@ def main():
                     continue
                 
                 window['-RUN-'].update(disabled=True, text='Fetching & Processing...')
-                window['-PROG-'].update(0)
-                threading.Thread(target=run_wrapper_api, args=(api_url, api_email, api_token, date_from, date_to, output_path, is_msm, window), daemon=True).start()
+                set_progress(0)
+                run_active = True
+                executor.submit(run_wrapper_api, api_url, api_email, api_token, date_from, date_to, output_path, is_msm).add_done_callback(on_run_done)
 
-        if event == '-THREAD-DONE-':
+        elif event == '-THREAD-DONE-':
+            run_active = False
             window['-RUN-'].update(disabled=False, text='RUN PROCESS')
-            sg.popup("Process Completed!", "Check logs for details.", title="Success")
+            if values[event]:
+                sg.popup("Process Completed!", "Check logs for details.", title="Success")
+            else:
+                sg.popup_error("Process did not complete.", "Check logs for details.")
 
-        if event == '-CLEAR-':
+        elif event == '-CLEAR-':
             for key in ['-INPUT-FILE-', '-DATE-FROM-', '-DATE-TO-']:
                 window[key].update('')
             window['-API-URL-'].update(default_url)
@@ -192,37 +307,66 @@ def main():
             window['-API-TOKEN-'].update(default_token)
             
             # Reset output name to default without dates
-            default_out = 'MSM_Upload_Output.xlsx' if values['-TYPE-MSM-'] else 'Applens_Upload_Output.xlsx'
+            default_out = ('MSM_Upload_Output' if values['-TYPE-MSM-'] else 'Applens_Upload_Output') + OUTPUT_FORMATS[values['-FORMAT-']]
             window['-OUTPUT-'].update(default_out)
             
-            window['-PROG-'].update(0)
+            set_progress(0)
         
-        if event == '-DOWNLOAD-LOG-':
-            log_files = ['applens_conversion.log', 'msm_conversion.log']
-            found_logs = [f for f in log_files if os.path.exists(f)]
+        elif event == '-DOWNLOAD-LOG-':
+            # One directory scan; DirEntry caches its stat, so each log is stat'ed once
+            log_files = {'applens_conversion.log', 'msm_conversion.log'}
+            with os.scandir('.') as entries:
+                found_logs = [e for e in entries if e.name in log_files and e.is_file()]
             if found_logs:
-                latest = max(found_logs, key=os.path.getmtime)
+                latest = max(found_logs, key=lambda e: e.stat().st_mtime).path
                 save = sg.popup_get_file('Save Log', save_as=True, file_types=(("Text", "*.log"),))
-                if save: shutil.copy(latest, save)
+                # copyfile skips copy()'s chmod and copies in-kernel (sendfile) where available
+                if save: shutil.copyfile(latest, save)
 
+    # Nothing drains the log queue once the loop ends, and the worker thread is joined at
+    # exit: detach the handler, then empty the queue so a worker already waiting in a
+    # blocking put can return
+    logger.removeHandler(gui_handler)
+    while True:
+        try:
+            log_queue.get_nowait()
+        except queue.Empty:
+            break
+    gui_handler.close()
+
+    # A run already in progress still finishes (its output is never left half-written)
+    executor.shutdown(wait=False, cancel_futures=True)
     window.close()
 
-def run_wrapper_file(input_path, output_path, is_msm, window):
-    if is_msm: run_msm(input_path, output_path)
-    else: run_applens(input_path, output_path)
-    window.write_event_value('-THREAD-DONE-', '')
-
-def run_wrapper_api(url, email, token, start, end, output_path, is_msm, window):
-    temp_csv = "Jira_API_Dump.csv"
-    success = fetch_jira_issues(url, email, token, start, end, temp_csv)
-    
-    if success:
-        if is_msm: run_msm(temp_csv, output_path)
-        else: run_applens(temp_csv, output_path)
-        if os.path.exists(temp_csv):
-            os.remove(temp_csv)
-            
-    window.write_event_value('-THREAD-DONE-', '')
+def warm_imports():
+    """Imports the pipelines ahead of the first run; later imports hit sys.modules."""
+    import applens_transformer, msm_transformer, jira_fetcher  # noqa: F401
+
+def run_wrapper_file(input_path, output_path, is_msm):
+    """Runs one file conversion on the worker thread; returns the pipeline's success flag."""
+    # Import BOTH pipelines using aliases for clarity
+    from applens_transformer import run_applens_transformation_pipeline as run_applens
+    from msm_transformer import run_msm_transformation_pipeline as run_msm
+
+    if is_msm: return run_msm(input_path, output_path)
+    # Stat on the worker thread so the UI thread never touches the file system;
+    # the Applens pipeline picks its streaming/mmap strategy from the size
+    file_size = os.path.getsize(input_path) if os.path.exists(input_path) else 0
+    return run_applens(input_path, output_path, file_size=file_size)
+
+def run_wrapper_api(url, email, token, start, end, output_path, is_msm):
+    """Fetches from Jira and converts on the worker thread; returns the success flag."""
+    from applens_transformer import run_applens_transformation_pipeline as run_applens
+    from msm_transformer import run_msm_transformation_pipeline as run_msm
+    from jira_fetcher import fetch_jira_frame
+
+    # The fetched dump goes straight to the transformer; no CSV is written and re-read
+    jira_df = fetch_jira_frame(url, email, token, start, end, profile='msm' if is_msm else 'applens')
+
+    if jira_df is None:
+        return False
+    if is_msm: return run_msm(jira_df, output_path)
+    return run_applens(jira_df, output_path)
 
 if __name__ == '__main__':
     main()
\ No newline at end of file
@@ -1,11 +1,49 @@
 import pandas as pd
+import numpy as np
 import logging
 import os
+import csv
 from datetime import datetime
-from typing import Optional, List, Dict
+from typing import Optional, List, Dict, Union
+
+from csv_reader import begin_source_read, read_csv_pyarrow
+from pipeline_log import setup_pipeline_logger
 
 # --- MSM CONFIGURATION ---
 
+# Header matching for Jira exports, checked in order: (canonical name, exact lowercase
+# names, lowercase substrings). Each canonical column takes the first header that matches.
+COLUMN_MATCH_RULES = [
+    ('Issue Key', {'issue key', 'key'}, ()),
+    ('Project Name', {'project name', 'project'}, ()),
+    ('Summary', {'summary'}, ()),
+    ('Assignee', set(), ('assignee',)),
+    ('Priority', {'priority'}, ()),
+    ('Status', {'status'}, ()),
+    ('Platform', set(), ('platform',)),
+    ('Created', set(), ('created',)),
+    ('Updated', set(), ('updated',)),
+    ('Resolved', set(), ('resolved',)),
+    ('Worklog', set(), ('worklog', 'time spent'))
+]
+
+# MSM columns copied straight from the Jira export: output header -> source column
+# (Status, Created and Updated each feed two outputs, as per conversion.md)
+MSM_SOURCE_COLUMNS = {
+    'Tower': 'Project Name',
+    'JIRA ID': 'Issue Key',
+    'Issue Summary': 'Summary',
+    'Assignee': 'Assignee',
+    'Platform / Content / Data': 'Platform',
+    'Status': 'Status',
+    'Issue Status': 'Status',
+    'Issue Creation Time mm/dd/yyyy hh:mm:ss am/pm': 'Created',
+    'Issue Assigned Time (CTS)mm/dd/yyyy hh:mm:ss am/pm': 'Created',
+    'CTS Response Time mm/dd/yyyy hh:mm:ss am/pm': 'Updated',
+    'CTS Resolution Time mm/dd/yyyy hh:mm:ss am/pm': 'Resolved',
+    'Last updated Date': 'Updated'
+}
+
 # Priority mapping as per conversion.md
 PRIORITY_MAPPING = {
     'Not set': 'P3 (Low)',
@@ -14,6 +52,35 @@ PRIORITY_MAPPING = {
     'Major': 'P1 (High)'
 }
 
+class PriorityLookup(dict):
+    """Priority mapping whose misses (unknown or blank priorities) resolve to P3 (Low).
+
+    Unlike defaultdict, a miss returns the fallback without inserting the key, so the
+    shared module-level table never grows across runs.
+    """
+    def __missing__(self, key):
+        return 'P3 (Low)'
+
+PRIORITY_LOOKUP = PriorityLookup(PRIORITY_MAPPING)
+
+# Worklog arrives in seconds; Time Spent() is reported in hours
+SECONDS_TO_HOURS = 1.0 / 3600.0
+
+# Fields that need clarification - written empty for now
+MSM_BLANK_COLUMNS = (
+    'Service Category', 'Request Type', 'Causal Code', 'Resolution Code',
+    'High Level Debt Classification', 'Technical Debt Classification',
+    'Functional Debt Classification', 'Operational Debt Classification',
+    'Knowledge Debt Classification'
+)
+
+# Low-cardinality MSM columns (constants, flags, statuses, towers), held as categoricals
+# so each row stores a small code instead of its own string
+MSM_CATEGORY_COLUMNS = (
+    'Application', 'Month', 'Response SLA Met?', 'Resolution SLA Met?',
+    'Priority', 'Status', 'Issue Status', 'Tower'
+)
+
 # MSM output column order - exact as specified
 MSM_FINAL_COLUMN_ORDER: List[str] = [
     "S.No",
@@ -49,40 +116,34 @@ MSM_FINAL_COLUMN_ORDER: List[str] = [
 # --- LOGGING ---
 
 def setup_msm_logger(name: str = 'ApplensTransformer') -> logging.Logger:
-    logger = logging.getLogger(name)
-    logger.setLevel(logging.INFO)
-
-    # Only add file handler if not already present
-    has_file_handler = any(isinstance(h, logging.FileHandler) and 'msm_conversion.log' in str(h.baseFilename) for h in logger.handlers)
-    
-    if not has_file_handler:
-        # File Handler only - GUI handler will be added by main_gui.py
-        file_handler = logging.FileHandler('msm_conversion.log', delay=True)
-        formatter = logging.Formatter('%(asctime)s - %(levelname)s - %(message)s')
-        file_handler.setFormatter(formatter)
-        logger.addHandler(file_handler)
-
-    return logger
+    # File handler only - the console handler comes from applens_transformer and the
+    # GUI handler is added by main_gui.py
+    return setup_pipeline_logger(name, 'msm_conversion.log')
 
 logger = setup_msm_logger('ApplensTransformer')
 
 # --- MSM PIPELINE FUNCTIONS ---
 
-def load_jira_data(file_path: str) -> Optional[pd.DataFrame]:
-    logger.info(f"Phase 1: Reading Jira CSV file from {file_path}")
-    
-    if not os.path.exists(file_path):
-        logger.error(f"File not found: {file_path}")
-        raise FileNotFoundError(f"Input file does not exist: {file_path}")
+def read_csv_header(file_path: str) -> List[str]:
+    # utf-8-sig drops a leading BOM, as pandas does for the first column name
+    try:
+        with open(file_path, 'r', encoding='utf-8-sig', newline='') as f:
+            return next(csv.reader(f), [])
+    except UnicodeDecodeError:
+        with open(file_path, 'r', encoding='latin1', newline='') as f:
+            return next(csv.reader(f), [])
+
+def load_jira_data(file_path: Union[str, pd.DataFrame]) -> Optional[pd.DataFrame]:
+    from_frame = begin_source_read(file_path, logger, 'Jira CSV')
 
     try:
-        # First, read only headers to identify required columns
-        try:
-            header_df = pd.read_csv(file_path, nrows=0, encoding='utf-8')
-        except UnicodeDecodeError:
-            header_df = pd.read_csv(file_path, nrows=0, encoding='latin1')
-        
-        all_columns = list(header_df.columns)
+        # First, read only headers to identify required columns (the header line is
+        # enough, so the csv module reads it without setting up a pandas parser)
+        if from_frame:
+            all_columns = list(file_path.columns)
+        else:
+            all_columns = read_csv_header(file_path)
+
         logger.info(f"Found {len(all_columns)} total columns in file")
         
         # Find matching columns using precise matching to avoid duplicates
@@ -92,94 +153,38 @@ def load_jira_data(file_path: str) -> Optional[pd.DataFrame]:
         
         for col in all_columns:
             col_lower = col.lower().strip()
-            
-            # Issue Key - exact match first, then flexible
-            if 'Issue Key' not in found_columns:
-                if col_lower == 'issue key' or col_lower == 'key':
-                    columns_to_read.append(col)
-                    column_map[col] = 'Issue Key'
-                    found_columns.add('Issue Key')
+
+            # First rule still looking for a column that this header satisfies
+            for canonical, exact_names, substrings in COLUMN_MATCH_RULES:
+                if canonical in found_columns:
                     continue
-            
-            # Project Name - be more specific
-            if 'Project Name' not in found_columns:
-                if col_lower == 'project name' or col_lower == 'project':
+                if col_lower in exact_names or any(sub in col_lower for sub in substrings):
                     columns_to_read.append(col)
-                    column_map[col] = 'Project Name'
-                    found_columns.add('Project Name')
-                    continue
-            
-            # Summary
-            if 'Summary' not in found_columns and col_lower == 'summary':
-                columns_to_read.append(col)
-                column_map[col] = 'Summary'
-                found_columns.add('Summary')
-                continue
-            
-            # Assignee
-            if 'Assignee' not in found_columns and 'assignee' in col_lower:
-                columns_to_read.append(col)
-                column_map[col] = 'Assignee'
-                found_columns.add('Assignee')
-                continue
-            
-            # Priority
-            if 'Priority' not in found_columns and col_lower == 'priority':
-                columns_to_read.append(col)
-                column_map[col] = 'Priority'
-                found_columns.add('Priority')
-                continue
-            
-            # Status
-            if 'Status' not in found_columns and col_lower == 'status':
-                columns_to_read.append(col)
-                column_map[col] = 'Status'
-                found_columns.add('Status')
-                continue
-            
-            # Platform
-            if 'Platform' not in found_columns and 'platform' in col_lower:
-                columns_to_read.append(col)
-                column_map[col] = 'Platform'
-                found_columns.add('Platform')
-                continue
-            
-            # Created
-            if 'Created' not in found_columns and 'created' in col_lower:
-                columns_to_read.append(col)
-                column_map[col] = 'Created'
-                found_columns.add('Created')
-                continue
-            
-            # Updated
-            if 'Updated' not in found_columns and 'updated' in col_lower:
-                columns_to_read.append(col)
-                column_map[col] = 'Updated'
-                found_columns.add('Updated')
-                continue
-            
-            # Resolved
-            if 'Resolved' not in found_columns and 'resolved' in col_lower:
-                columns_to_read.append(col)
-                column_map[col] = 'Resolved'
-                found_columns.add('Resolved')
-                continue
-            
-            # Worklog
-            if 'Worklog' not in found_columns and ('worklog' in col_lower or 'time spent' in col_lower):
-                columns_to_read.append(col)
-                column_map[col] = 'Worklog'
-                found_columns.add('Worklog')
-                continue
+                    column_map[col] = canonical
+                    found_columns.add(canonical)
+                    break
         
         logger.info(f"Reading {len(columns_to_read)} relevant columns: {list(column_map.values())}")
         
         # Read only the required columns
-        try:
-            df = pd.read_csv(file_path, usecols=columns_to_read, encoding='utf-8')
-        except UnicodeDecodeError:
-            logger.warning("UTF-8 decode failed, retrying with latin1.")
-            df = pd.read_csv(file_path, usecols=columns_to_read, encoding='latin1')
+        if from_frame:
+            df = file_path[columns_to_read]
+        else:
+            # Multithreaded PyArrow read when available (every column as text; Worklog
+            # goes through to_numeric below), pandas C parser otherwise
+            try:
+                df = read_csv_pyarrow(file_path, column_map)
+            except (ImportError, ValueError) as e:
+                # pyarrow not installed, or it rejected the bytes (e.g. non UTF-8 input)
+                logger.info(f"PyArrow CSV reader unavailable ({e}), using default parser.")
+                # Every column as text, like the PyArrow path, so the parser skips type
+                # inference (Worklog included: to_numeric coerces it downstream)
+                dtypes = dict.fromkeys(columns_to_read, 'string')
+                try:
+                    df = pd.read_csv(file_path, usecols=columns_to_read, dtype=dtypes, encoding='utf-8', low_memory=False)
+                except UnicodeDecodeError:
+                    logger.warning("UTF-8 decode failed, retrying with latin1.")
+                    df = pd.read_csv(file_path, usecols=columns_to_read, dtype=dtypes, encoding='latin1', low_memory=False)
         
         # Apply column mapping and handle any remaining duplicates
         df = df.rename(columns=column_map)
@@ -191,202 +196,175 @@ def load_jira_data(file_path: str) -> Optional[pd.DataFrame]:
         return df
         
     except Exception as e:
-        logger.critical(f"Failed to read CSV file: {str(e)}")
+        logger.critical(f"Failed to read CSV file: {str(e)}", extra={'progress': 0})
         raise e
 
 def apply_msm_transformations(df: pd.DataFrame) -> pd.DataFrame:
-    logger.info("Phase 2: Applying MSM transformations...")
+    logger.info("Phase 2: Applying MSM transformations...", extra={'progress': 50})
     
-    # Create new dataframe with MSM structure
-    msm_df = pd.DataFrame()
+    # Every direct copy comes out of one reindex: columns missing from the export are
+    # filled with '' and the block is relabelled to the MSM headers in a single step
+    msm_df = df.reindex(columns=list(MSM_SOURCE_COLUMNS.values()), fill_value='')
+    msm_df = msm_df.set_axis(list(MSM_SOURCE_COLUMNS), axis=1)
     
     # Sequential numbering (1, 2, 3...)
-    msm_df['S.No'] = range(1, len(df) + 1)
-    
-    # Tower - Direct copy from Project Name
-    msm_df['Tower'] = df.get('Project Name', '')
-    
-    # Application - Constant (same for all rows)
-    msm_df['Application'] = 'HMOF'
-    
-    # JIRA ID - Direct copy from Issue Key
-    msm_df['JIRA ID'] = df.get('Issue Key', '')
+    msm_df.insert(0, 'S.No', range(1, len(df) + 1))
     
     # Priority - Map according to conversion.md
     if 'Priority' in df.columns:
-        msm_df['Priority'] = df['Priority'].map(PRIORITY_MAPPING).fillna('P3 (Low)')
+        priority = df['Priority'].map(PRIORITY_LOOKUP)
     else:
-        msm_df['Priority'] = 'P3 (Low)'
-    
-    # Issue Summary - Direct copy from Summary
-    msm_df['Issue Summary'] = df.get('Summary', '')
-    
-    # Assignee - Direct copy
-    msm_df['Assignee'] = df.get('Assignee', '')
-    
-    # Platform / Content / Data - Direct copy from Platform
-    msm_df['Platform / Content / Data'] = df.get('Platform', '')
-    
-    # Status - Direct copy
-    msm_df['Status'] = df.get('Status', '')
-    
-    # Issue Status - Direct copy (same as Status)
-    msm_df['Issue Status'] = df.get('Status', '')
+        priority = 'P3 (Low)'
     
     # Month - Constant based on current month
     current_month = datetime.now().strftime('%B')
-    msm_df['Month'] = current_month
-    
-    # Issue Creation Time - Direct copy from Created
-    msm_df['Issue Creation Time mm/dd/yyyy hh:mm:ss am/pm'] = df.get('Created', '')
-    
-    # Issue Assigned Time - Direct copy from Created (as per conversion.md)
-    msm_df['Issue Assigned Time (CTS)mm/dd/yyyy hh:mm:ss am/pm'] = df.get('Created', '')
-    
-    # CTS Response Time - Direct copy from Updated
-    msm_df['CTS Response Time mm/dd/yyyy hh:mm:ss am/pm'] = df.get('Updated', '')
-    
-    # Response SLA Met - Constant: Yes
-    msm_df['Response SLA Met?'] = 'Yes'
-    
-    # CTS Resolution Time - Direct copy from Resolved
-    msm_df['CTS Resolution Time mm/dd/yyyy hh:mm:ss am/pm'] = df.get('Resolved', '')
     
     # Resolution SLA Met - If JIRA ID contains CSI → Yes, else → NA
-    msm_df['Resolution SLA Met?'] = msm_df['JIRA ID'].apply(
-        lambda x: 'Yes' if 'CSI' in str(x).upper() else 'NA'
-    )
-    
-    # Last updated Date - Direct copy from Updated
-    msm_df['Last updated Date'] = df.get('Updated', '')
-    
-    # Fields that need clarification - set as empty for now
-    msm_df['Service Category'] = ''
-    msm_df['Request Type'] = ''
-    msm_df['Causal Code'] = ''
-    msm_df['Resolution Code'] = ''
-    msm_df['High Level Debt Classification'] = ''
-    msm_df['Technical Debt Classification'] = ''
-    msm_df['Functional Debt Classification'] = ''
-    msm_df['Operational Debt Classification'] = ''
-    msm_df['Knowledge Debt Classification'] = ''
+    # (one vectorized, case-insensitive substring scan instead of a per-row lambda)
+    jira_ids = msm_df['JIRA ID'].astype('string')
+    is_csi = jira_ids.str.contains('CSI', case=False, na=False, regex=False)
     
     # Time Spent - Convert to hours format (input is in seconds)
     if 'Worklog' in df.columns:
-        time_spent = pd.to_numeric(df['Worklog'], errors='coerce').fillna(0)
-        # Convert from seconds to hours (divide by 3600)
-        time_in_hours = (time_spent / 3600).round(2)
-        msm_df['Time Spent()'] = time_in_hours
+        # Blanks and junk become 0 while converting to a plain float array (which may
+        # still share the source column's buffer, so it is only read)
+        time_spent = pd.to_numeric(df['Worklog'], errors='coerce').to_numpy(dtype='float64', na_value=0.0)
+        # Convert from seconds to hours (multiply by the precomputed 1/3600), then
+        # round the fresh array in place
+        time_in_hours = time_spent * SECONDS_TO_HOURS
+        time_in_hours = np.round(time_in_hours, 2, out=time_in_hours)
     else:
-        msm_df['Time Spent()'] = 0.0
+        time_in_hours = 0.0
+    
+    # Constants and derived columns go in with one assign rather than one insert each
+    msm_df = msm_df.assign(**{
+        'Application': 'HMOF',  # Constant (same for all rows)
+        'Priority': priority,
+        'Month': current_month,
+        'Response SLA Met?': 'Yes',  # Constant: Yes
+        'Resolution SLA Met?': np.where(is_csi, 'Yes', 'NA'),
+        'Time Spent()': time_in_hours
+    }, **dict.fromkeys(MSM_BLANK_COLUMNS, ''))
+    
+    # Repeated values are stored once per column
+    for col in MSM_CATEGORY_COLUMNS:
+        msm_df[col] = msm_df[col].astype('category')
     
     logger.info(f"MSM transformation complete. Generated {len(msm_df)} rows.")
     return msm_df
 
 def validate_msm_data(df: pd.DataFrame) -> pd.DataFrame:
-    logger.info("Phase 3: Validating MSM data...")
+    logger.info("Phase 3: Validating MSM data...", extra={'progress': 75})
     
     # Ensure all required columns exist in correct order
     for col in MSM_FINAL_COLUMN_ORDER:
         if col not in df.columns:
             df[col] = ''
     
-    # Clean and validate data
-    initial_count = len(df)
-    df = df.dropna(subset=['JIRA ID'], how='all')
-    if len(df) < initial_count:
-        logger.warning(f"Dropped {initial_count - len(df)} rows with missing JIRA IDs.")
+    # Clean and validate data: drop rows missing JIRA ID with one boolean mask; clean
+    # inputs skip the copy entirely. (A missing Issue Key column arrives as '', which
+    # is kept, as before.)
+    has_jira_id = df['JIRA ID'].notna()
+    dropped = len(df) - int(has_jira_id.sum())
+    if dropped:
+        df = df.loc[has_jira_id]
+        logger.warning(f"Dropped {dropped} rows with missing JIRA IDs.")
     
-    # Fill missing values appropriately
-    df = df.fillna('')
+    # Fill missing values appropriately, touching only the columns that have any
+    # (categoricals only take known values, so '' becomes one of their categories first)
+    has_nulls = df.isna().any()
+    null_columns = has_nulls.index[has_nulls]
+    for col in null_columns:
+        if isinstance(df[col].dtype, pd.CategoricalDtype) and '' not in df[col].cat.categories:
+            df[col] = df[col].cat.add_categories('')
+    if len(null_columns):
+        df = df.fillna(dict.fromkeys(null_columns, ''))
     
     logger.info("MSM validation complete.")
     return df
 
 def save_msm_file(df: pd.DataFrame, output_path: str) -> bool:
-    logger.info(f"Phase 4: Writing MSM output to {output_path}")
+    logger.info(f"Phase 4: Writing MSM output to {output_path}", extra={'progress': 90})
+    
+    # Ensure columns are in exact order as specified
+    df_final = df[MSM_FINAL_COLUMN_ORDER]
+    output_ext = os.path.splitext(output_path)[1].lower()
+    
+    if output_ext in ('.parquet', '.feather'):
+        # Columnar outputs for downstream tools: the same data without the workbook
+        # formatting. Feather stores no index, so it gets a default one after row drops.
+        try:
+            if output_ext == '.parquet':
+                df_final.to_parquet(output_path, engine='pyarrow', compression='snappy', index=False)
+            else:
+                df_final.reset_index(drop=True).to_feather(output_path)
+            logger.info("SUCCESS: MSM transformation complete.", extra={'progress': 100})
+            return True
+        except Exception as e:
+            logger.error(f"Failed to write MSM output file: {e}", extra={'progress': 0})
+            return False
     
     try:
-        from openpyxl import Workbook
-        from openpyxl.styles import Font, Alignment, PatternFill, Border, Side
-        from openpyxl.utils.dataframe import dataframe_to_rows
-        
-        # Ensure columns are in exact order as specified
-        df_final = df[MSM_FINAL_COLUMN_ORDER]
-        
-        # Create workbook and worksheet
-        wb = Workbook()
-        ws = wb.active
-        ws.title = "MSM Data"
-        
-        # Add data to worksheet
-        for r in dataframe_to_rows(df_final, index=False, header=True):
-            ws.append(r)
-        
-        # Style the header row
-        header_font = Font(bold=True, color="FFFFFF", size=10)
-        header_fill = PatternFill(start_color="366092", end_color="366092", fill_type="solid")
-        header_alignment = Alignment(horizontal="center", vertical="center", wrap_text=True)
-        
-        # Set header row height to accommodate wrapped text
-        ws.row_dimensions[1].height = 45
-        
-        # Apply header formatting
-        for cell in ws[1]:
-            cell.font = header_font
-            cell.fill = header_fill
-            cell.alignment = header_alignment
-        
-        # Auto-adjust column widths with minimum width for headers
-        for column in ws.columns:
-            max_length = 0
-            column_letter = column[0].column_letter
-            for cell in column:
-                try:
-                    if len(str(cell.value)) > max_length:
-                        max_length = len(str(cell.value))
-                except:
-                    pass
-            # Ensure minimum width of 15 for proper header display
-            adjusted_width = max(min(max_length + 2, 50), 15)
-            ws.column_dimensions[column_letter].width = adjusted_width
-        
-        # Add borders to all cells with data
-        thin_border = Border(
-            left=Side(style='thin'),
-            right=Side(style='thin'),
-            top=Side(style='thin'),
-            bottom=Side(style='thin')
-        )
-        
-        for row in ws.iter_rows(min_row=1, max_row=len(df_final)+1, min_col=1, max_col=len(MSM_FINAL_COLUMN_ORDER)):
-            for cell in row:
-                cell.border = thin_border
-                if cell.row > 1:  # Data rows
-                    cell.alignment = Alignment(vertical="center")
-        
-        # Freeze the header row
-        ws.freeze_panes = "A2"
+        # constant_memory flushes each row to disk once the next begins, so memory stays
+        # flat whatever the row count; row/column settings must therefore come first.
+        # strings_to_urls is off so URL-looking text stays plain text, as before.
+        with pd.ExcelWriter(output_path, engine='xlsxwriter',
+                            engine_kwargs={'options': {'constant_memory': True, 'strings_to_urls': False}}) as writer:
+            ws = writer.book.add_worksheet("MSM Data")
+            
+            # Style the header row; borders for all cells with data, data rows centred vertically
+            header_format = writer.book.add_format({
+                'bold': True, 'font_color': '#FFFFFF', 'font_size': 10,
+                'bg_color': '#366092', 'pattern': 1,
+                'align': 'center', 'valign': 'vcenter', 'text_wrap': True, 'border': 1
+            })
+            data_format = writer.book.add_format({'valign': 'vcenter', 'border': 1})
+            
+            # Set header row height to accommodate wrapped text
+            ws.set_row(0, 45)
+            
+            # Auto-adjust column widths with minimum width for headers (value lengths are
+            # measured per column by pandas; an empty export sizes to its headers)
+            for col_idx, column in enumerate(MSM_FINAL_COLUMN_ORDER):
+                value_length = df_final[column].astype(str).str.len().max() if len(df_final) else 0
+                max_length = max(len(column), int(value_length))
+                # Ensure minimum width of 15 for proper header display
+                adjusted_width = max(min(max_length + 2, 50), 15)
+                ws.set_column(col_idx, col_idx, adjusted_width)
+            
+            # Freeze the header row
+            ws.freeze_panes(1, 0)
+            
+            ws.write_row(0, 0, MSM_FINAL_COLUMN_ORDER, header_format)
+            
+            # write_row past the sheet's last row returns -1 instead of raising
+            if len(df_final) >= ws.xls_rowmax:
+                raise ValueError(f"This sheet is too large! Excel allows at most {ws.xls_rowmax - 1} data rows.")
+            
+            # Add data to worksheet, one formatted row at a time (rows of a single object
+            # array iterate faster than itertuples, which zips Series iterators per row)
+            for row_idx, row in enumerate(df_final.to_numpy(dtype=object).tolist(), start=1):
+                ws.write_row(row_idx, 0, row, data_format)
         
-        # Save the workbook
-        wb.save(output_path)
-        logger.info("SUCCESS: MSM transformation complete with enhanced formatting.")
+        logger.info("SUCCESS: MSM transformation complete with enhanced formatting.", extra={'progress': 100})
         return True
         
     except Exception as e:
-        logger.error(f"Failed to write MSM output file: {e}")
+        logger.error(f"Failed to write MSM output file: {e}", extra={'progress': 0})
         # Fallback to basic Excel export
         try:
-            df_final = df[MSM_FINAL_COLUMN_ORDER]
             df_final.to_excel(output_path, index=False)
-            logger.info("SUCCESS: MSM transformation complete (basic format).")
+            logger.info("SUCCESS: MSM transformation complete (basic format).", extra={'progress': 100})
             return True
         except Exception as e2:
-            logger.error(f"Fallback export also failed: {e2}")
+            # Neither writer finished, so whatever is on disk is a partial workbook
+            if os.path.exists(output_path):
+                os.remove(output_path)
+            logger.error(f"Fallback export also failed: {e2}", extra={'progress': 0})
             return False
 
-def run_msm_transformation_pipeline(input_path: str, output_path: str) -> bool:
-    """Main pipeline function for Jira to MSM conversion"""
+def run_msm_transformation_pipeline(input_path: Union[str, pd.DataFrame], output_path: str) -> bool:
+    """Main pipeline function for Jira to MSM conversion (CSV path or fetched DataFrame)"""
     try:
         df = load_jira_data(input_path)
         df = apply_msm_transformations(df)
@@ -394,7 +372,7 @@ def run_msm_transformation_pipeline(input_path: str, output_path: str) -> bool:
         success = save_msm_file(df, output_path)
         return success
     except Exception as e:
-        logger.error(f"MSM Pipeline failed: {str(e)}")
+        logger.error(f"MSM Pipeline failed: {str(e)}", extra={'progress': 0})
         return False
 
 if __name__ == "__main__":
@@ -0,0 +1,63 @@
+import logging
+import logging.handlers
+import os
+import threading
+import time
+
+# Logging setup shared by the Applens and MSM pipelines (both log to the
+# 'ApplensTransformer' logger, each into its own file). Kept free of GUI imports.
+
+# Log files rotate at this size, keeping this many old files, so the GUI's
+# "Download Log" always copies a bounded file
+LOG_MAX_BYTES = 10 * 1024 * 1024
+LOG_BACKUP_COUNT = 3
+
+# Line format shared by the console, file and GUI handlers
+LOG_FORMAT = '%(asctime)s - %(levelname)s - %(message)s'
+
+# Imports can race when the GUI's worker threads first load the pipelines; the
+# handler check-and-add below runs under this lock so each handler lands once
+_setup_lock = threading.Lock()
+
+class CachedTimeFormatter(logging.Formatter):
+    """Formatter that runs strftime once per wall-clock second instead of per record."""
+    def __init__(self, *args, **kwargs):
+        logging.Formatter.__init__(self, *args, **kwargs)
+        self._cached_second = None
+        self._cached_time = ''
+
+    def formatTime(self, record, datefmt=None):
+        # Called under the handler lock, so the two cache fields stay consistent
+        second = int(record.created)
+        if second != self._cached_second:
+            self._cached_time = time.strftime(datefmt or self.default_time_format, self.converter(record.created))
+            self._cached_second = second
+        if datefmt:
+            return self._cached_time
+        return self.default_msec_format % (self._cached_time, record.msecs)
+
+def setup_pipeline_logger(name: str, log_file: str, console: bool = False) -> logging.Logger:
+    """Returns the named logger with a rotating handler for ``log_file`` (and a console
+    handler when asked), adding each one at most once."""
+    logger = logging.getLogger(name)
+    logger.setLevel(logging.INFO)
+    # Handlers live on this logger; stop records from also walking up to the root's
+    logger.propagate = False
+
+    with _setup_lock:
+        # Console Handler (exact class match: FileHandler subclasses StreamHandler). Each
+        # handler gets its own formatter: the per-second strftime cache relies on the
+        # handler's lock.
+        if console and not any(type(h) is logging.StreamHandler for h in logger.handlers):
+            console_handler = logging.StreamHandler()
+            console_handler.setFormatter(CachedTimeFormatter(LOG_FORMAT))
+            logger.addHandler(console_handler)
+
+        # Rotating File Handler (delay=True prevents empty files on import). Matched by path, so
+        # a module reload or the other pipeline's handlers on this logger never double it.
+        log_path = os.path.abspath(log_file)
+        if not any(isinstance(h, logging.FileHandler) and h.baseFilename == log_path for h in logger.handlers):
+            file_handler = logging.handlers.RotatingFileHandler(log_path, maxBytes=LOG_MAX_BYTES, backupCount=LOG_BACKUP_COUNT, delay=True)
+            file_handler.setFormatter(CachedTimeFormatter(LOG_FORMAT))
+            logger.addHandler(file_handler)
+    return logger